@@ -0,0 +1,76 @@
+import csv
+import os
+import random
+import re
+import tempfile
+import time
+
+from task_scan import compile_prefilter, scan_candidates
+
+
+FIELDNAMES = ['id', 'title', 'description', 'category', 'due_date', 'priority', 'status']
+
+
+def generate_tasks(data_path: str, count: int) -> None:
+    """
+    Fills the task file with random tasks,
+    one task in a thousand belongs to the "Rare" category
+    parameters:
+        data_path: str - Path to the task file
+        count: int - Number of tasks
+    return: None
+    """
+    random.seed(0)
+    with open(data_path, 'w') as file_for_write:
+        writer = csv.DictWriter(f=file_for_write, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for id in range(1, count + 1):
+            writer.writerow({'id': id, 'title': f'Task {id}',
+                             'description': f'Description of the task {id},\nsecond line',
+                             'category': 'Rare' if id % 1000 == 0 else random.choice(['Work', 'Home', 'Study']),
+                             'due_date': '2030-01-01', 'priority': random.choice(['High', 'Medium', 'Low']),
+                             'status': random.choice(['True', 'False'])})
+
+
+def search_full_parse(data_path: str, category: str) -> list[dict]:
+    """
+    Searches by category parsing every task
+    """
+    pattern = re.compile(r'\b{}\b'.format(re.escape(category)), re.IGNORECASE)
+    with open(data_path, 'r') as file_for_read:
+        return [row for row in csv.DictReader(file_for_read) if pattern.search(row['category'])]
+
+
+def search_prefilter(data_path: str, category: str) -> list[dict]:
+    """
+    Searches by category parsing only the rows found by the prefilter
+    """
+    pattern = re.compile(r'\b{}\b'.format(re.escape(category)), re.IGNORECASE)
+    return [row for row in scan_candidates(data_path, compile_prefilter(category))
+            if pattern.search(row['category'])]
+
+
+def measure(function, *args) -> tuple[float, list]:
+    """
+    Returns the best of three run times and the result of the function
+    """
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, 'task_data.csv')
+        for count in [10_000, 100_000, 500_000]:
+            generate_tasks(data_path, count)
+            for category in ['rare', 'work']:
+                full_time, full_result = measure(search_full_parse, data_path, category)
+                prefilter_time, prefilter_result = measure(search_prefilter, data_path, category)
+                assert full_result == prefilter_result
+                print(f'{count} tasks | category {category!r} | {len(full_result)} found | '
+                      f'full parse {full_time:.3f}s | prefilter {prefilter_time:.3f}s | '
+                      f'x{full_time / prefilter_time:.1f}')
@@ -3,10 +3,42 @@ import csv
 import os
 from typing import Optional
 
-from validate_models import TaskModel, TaskModelForChange, TaskModelForRemove, TaskModelForSearch
-from typing import Union
+from validate_models import TaskModel, TaskModelForChange, TaskModelForRemove, TaskModelForSearch, TaskTemplateModel
+from task_recurrence import TEMPLATE_FIELDNAMES, get_period, iter_occurrences, read_templates, write_templates
+from task_scan import compile_prefilter
+from task_stats import COUNTED_FIELDS, add_occurrences, count_due, load_stats, rebuild_stats, record_changes
+from task_store import DEFAULT_STORE, STORE_ENVVAR, expand_stores, get_store, get_stores, query_stores
+from datetime import date, datetime
+from typing import Iterator, Union
 import re
 
+
+def echo_tasks(stores: list[str], results: Iterator[tuple[str, bool, list[dict]]]) -> tuple[bool, bool]:
+    """
+    Prints the found tasks of the task files as they are read, the
+    task file is added as the first column when several files are used
+    parameters:
+        stores: list[str] - Task files
+        results: Iterator[tuple[str, bool, list[dict]]] - Results of query_stores()
+    return: tuple[bool, bool] - whether the files contain any tasks
+            and whether any task was found
+    """
+    fieldnames = TEMPLATE_FIELDNAMES[:7] if len(stores) == 1 else ['store'] + TEMPLATE_FIELDNAMES[:7]
+    tasks_exist, task_exists = False, False
+    for data_path, has_tasks, tasks_data in results:
+        if has_tasks and not tasks_exist:
+            click.echo(' | '.join(fieldnames))
+        tasks_exist = tasks_exist or has_tasks
+        for row in tasks_data:
+            task_exists = True
+            store = f'{data_path} | ' if len(stores) != 1 else ''
+            click.echo(f'{store}{row["id"]} | {row["title"]} | '
+                    f'{row['description']} | {row['category']} | '
+                    f'{row['due_date']} | {row['priority']} | '
+                    f'{row['status']}')
+    return tasks_exist, task_exists
+
+
 class TaskManager:
     """
     The task manager class
@@ -17,55 +49,52 @@ class TaskManager:
         self.main.add_command(self.change_task)
         self.main.add_command(self.remove_task)
         self.main.add_command(self.task_search)
+        self.main.add_command(self.get_stats)
 
     @click.group()
-    def main() -> None:
+    @click.option('--store', 'stores', help=f'Task file, or for the list and search commands several files '
+                                            f'and directories of files, default: "{DEFAULT_STORE}"',
+                  type=click.Path(), multiple=True, envvar=STORE_ENVVAR)
+    @click.pass_context
+    def main(ctx: click.Context, stores: tuple[str, ...]) -> None:
         """
         A function that groups commands 
         for the task manager
+        parameters:
+            stores: tuple[str, ...] - Task files
+        return: None
         """
-        pass
+        ctx.obj = {'stores': list(stores)}
 
     @click.command('task-manager-list', help='Show list tasks')
     @click.option('--category', help='Viewing list of tasks: [String]', type=str)
-    def get_list_tasks(category: Optional[str]) -> None:
+    @click.option('--from', 'date_from', help='First day for recurring tasks: Date, format: "%Y-%m-%d", '
+                                              'default: today', type=click.DateTime(formats=['%Y-%m-%d']))
+    @click.option('--to', 'date_to', help='Last day for recurring tasks: Date, format: "%Y-%m-%d", '
+                                          'default: a week from the first day', type=click.DateTime(formats=['%Y-%m-%d']))
+    def get_list_tasks(category: Optional[str], date_from: Optional[datetime], date_to: Optional[datetime]) -> None:
         """
-        Viewing the task list
+        Viewing the task list, recurring tasks are shown
+        for each of their dates in the specified period
         parameters:
             category: Optional[str] - Category of the task
+            date_from: Optional[datetime] - First day for recurring tasks
+            date_to: Optional[datetime] - Last day for recurring tasks
         return: None
         """
-        if os.path.exists('misc/task_data.csv'):
-            with open('misc/task_data.csv', 'r') as file_for_read:
-                reader = csv.DictReader(file_for_read)
-                task_exists = False
-                data = list(reader)
-                if len(data) == 0:
-                    click.echo('No tasks found.')
-                    return
-                data.insert(0, reader.fieldnames)
-                for row in data:
-                    if category:
-                        if isinstance(row, list):
-                            click.echo(' | '.join(row))
-                        elif row['category'].lower() == category.lower():
-                            task_exists = True
-                            click.echo(f'{row["id"]} | {row["title"]} | '
-                                    f'{row['description']} | {row['category']} | '
-                                    f'{row['due_date']} | {row['priority']} | '
-                                    f'{row['status']}')
-                    else:
-                        if isinstance(row, list):
-                            click.echo(' | '.join(row))
-                        else:
-                            click.echo(f'{row["id"]} | {row["title"]} | '
-                                    f'{row['description']} | {row['category']} | '
-                                    f'{row['due_date']} | {row['priority']} | '
-                                    f'{row['status']}')
-                if not task_exists and category:
-                    click.echo('No tasks found in this category.')
-        else:
+        date_from, date_to = get_period(date_from, date_to)
+        stores = expand_stores(get_stores())
+
+        def matches(row: dict) -> bool:
+            return not category or row['category'].lower() == category.lower()
+
+        # Only rows containing the category in their raw bytes are parsed
+        tasks_exist, task_exists = echo_tasks(stores, query_stores(
+            stores, matches, compile_prefilter(category) if category else None, date_from, date_to))
+        if not tasks_exist:
             click.echo('No tasks found.')
+        elif not task_exists:
+            click.echo('No tasks found in this category.' if category else 'No tasks found.')
     
     @click.command('task-manager-add', help='Add a new task')
     @click.option('--t', 'title', help='Title: String, format: "Some text"', type=str)
@@ -74,32 +103,52 @@ class TaskManager:
     @click.option('--dd', 'due_date', help='Due date: Date, format: "%Y-%m-%d"', type=str)
     @click.option('--p', 'priority', help='Priority: String, format: ["High", "Medium", "Low"]', type=str)
     @click.option('--s', 'status', help='Status: Boolean, format: ["True", "False"]', type=str)
-    def add_task(title: str, description: str, category: str, due_date: str, priority: str, status: str) -> None:
+    @click.option('--repeat', 'repeat', help='Repeat: Optional[String], format: ["daily", "weekly", "monthly", '
+                                             '"minute hour day month weekday"]', type=str)
+    def add_task(title: str, description: str, category: str, due_date: str, priority: str, status: str,
+                 repeat: Union[str, None]) -> None:
         """
-        Adding a new task to the list
+        Adding a new task to the list, a recurring task is saved
+        once and its tasks are created only when they are viewed
         
         parameters:
             title: str - Title of the task
             description: str - Description of the task
             category: str - Category of the task
-            due_date: str - Due date of the task
+            due_date: str - Due date of the task, the first date for a recurring task
             priority: str - Priority of the task
             status: str - Status of the task
+            repeat: str - Repeat rule of a recurring task
         return: None
         """
+        store = get_store()
         try:
-            data = TaskModel(title=title, description=description, category=category, due_date=due_date, priority=priority, status=status)
+            if repeat:
+                data = TaskTemplateModel.model_validate(dict(title=title, description=description, category=category,
+                                                             due_date=due_date, priority=priority, status=status,
+                                                             repeat=repeat), context={'store': store})
+            else:
+                data = TaskModel.model_validate(dict(title=title, description=description, category=category,
+                                                     due_date=due_date, priority=priority, status=status),
+                                                context={'store': store})
         except (TypeError, ValueError) as exc:
             click.echo(f"{exc.__class__.__name__}: {exc}")
             return
         data = data.model_dump()
-        file_exists = os.path.exists('misc/task_data.csv')
-        with open('misc/task_data.csv', 'a') as file_for_write:
+        if repeat:
+            templates = read_templates(store)
+            templates.append(data)
+            write_templates(store, templates)
+            return
+        stats = load_stats(store)
+        file_exists = os.path.exists(store)
+        with open(store, 'a') as file_for_write:
             writer = csv.DictWriter(f=file_for_write, fieldnames=['id', 'title', 'description', 'category', 
                                                                   'due_date', 'priority', 'status'])
             if not file_exists:
                 writer.writeheader()
             writer.writerow(data)
+        record_changes(store, stats, added=[data])
     
     @click.command('task-manager-edit', help='Editing a task')
     @click.option('--id', 'id', help='ID of the task, type: Integer', type=int)
@@ -109,11 +158,17 @@ class TaskManager:
     @click.option('--dd', 'due_date', help='Due date: Date, format: "%Y-%m-%d"', type=str)
     @click.option('--p', 'priority', help='Priority: String, format: ["High", "Medium", "Low"]', type=str)
     @click.option('--s', 'status', help='Status: Boolean, format: ["True", "False"]', type=str)
-    def change_task(id: int, title: Union[str, None], description: Union[str, None], 
-                    category: Union[str, None], due_date: Union[str, None], priority: Union[str, None], status: Union[str, None]) -> None:
+    @click.option('--rid', 'template_id', help='ID of the recurring task, type: Integer', type=int)
+    @click.option('--on', 'occurrence_date', help='Date of the recurring task to change: Date, format: "%Y-%m-%d"',
+                  type=str)
+    def change_task(id: Union[int, None], title: Union[str, None], description: Union[str, None], 
+                    category: Union[str, None], due_date: Union[str, None], priority: Union[str, None], status: Union[str, None],
+                    template_id: Union[int, None], occurrence_date: Union[str, None]) -> None:
         """
         Changing the status of a task or any 
-        of its other parameters
+        of its other parameters. A recurring task is changed
+        for all dates, or, if the date is passed, the task
+        for that date is saved as a separate task and changed
         parameters:
             id: int - ID of the task
             title: str - Title of the task
@@ -122,20 +177,56 @@ class TaskManager:
             due_date: str - Due date of the task
             priority: str - Priority of the task
             status: str - Status of the task
+            template_id: int - ID of the recurring task
+            occurrence_date: str - Date of the recurring task
         return: None
         """
+        store = get_store()
         try:
             data = TaskModelForChange(id=id, title=title, description=description, 
-                                 category=category, due_date=due_date, priority=priority, status=status)
+                                 category=category, due_date=due_date, priority=priority, status=status,
+                                 template_id=template_id, occurrence_date=occurrence_date)
         except (TypeError, ValueError) as exc:
             click.echo(f"{exc.__class__.__name__}: {exc}")
             return
         data = data.model_dump()
-        if os.path.exists('misc/task_data.csv'):
-            with open('misc/task_data.csv', 'r') as file_for_read:
+        if data['template_id'] is not None:
+            templates = read_templates(store)
+            template = next((i for i in templates if int(i['id']) == data['template_id']), None)
+            if template is None:
+                click.echo('Invalid recurring task ID')
+                return
+            changes = {field: data[field] for field in ['title', 'description', 'category',
+                                                        'due_date', 'priority', 'status'] if data[field]}
+            if data['occurrence_date'] is None:
+                template.update(changes)
+                write_templates(store, templates)
+                return
+            occurrence_date = data['occurrence_date']
+            if next(iter_occurrences(template, occurrence_date, occurrence_date), None) is None:
+                click.echo('Invalid occurrence date')
+                return
+            stats = load_stats(store)
+            task = {field: template[field] for field in TEMPLATE_FIELDNAMES[:7]}
+            task.update(changes)
+            task['id'] = TaskModel.generate_id(store)
+            task['due_date'] = changes.get('due_date', occurrence_date)
+            with open(store, 'a') as file_for_write:
+                writer = csv.DictWriter(f=file_for_write, fieldnames=['id', 'title', 'description', 'category', 
+                                                                      'due_date', 'priority', 'status'])
+                writer.writerow(task)
+            record_changes(store, stats, added=[task])
+            # The recurring task no longer creates a task for this date
+            template['exceptions'] = ';'.join(filter(None, [template['exceptions'], occurrence_date.isoformat()]))
+            write_templates(store, templates)
+            return
+        if os.path.exists(store):
+            with open(store, 'r') as file_for_read:
                 reader = csv.DictReader(file_for_read)
                 list_data = list(reader)
                 if id in [int(i['id']) for i in list_data]:
+                    stats = load_stats(store)
+                    old_row = dict(list_data[id - 1])
                     if title:
                         list_data[id - 1]['title'] = data['title']
                     if description:
@@ -148,13 +239,14 @@ class TaskManager:
                         list_data[id - 1]['priority'] = data['priority']
                     if status:
                         list_data[id - 1]['status'] = data['status']
-                    with open('misc/task_data2.csv', 'w') as file_for_write:
+                    with open(store + '.tmp', 'w') as file_for_write:
                         writer = csv.DictWriter(f=file_for_write, fieldnames=['id', 'title', 'description', 'category', 
                                                                   'due_date', 'priority', 'status'])
                         writer.writeheader()
                         writer.writerows(list_data)
-                        os.remove('misc/task_data.csv')
-                        os.rename('misc/task_data2.csv', 'misc/task_data.csv')
+                        os.remove(store)
+                        os.rename(store + '.tmp', store)
+                    record_changes(store, stats, added=[list_data[id - 1]], removed=[old_row])
                 else:
                     click.echo('Invalid task ID')
         else:
@@ -163,67 +255,98 @@ class TaskManager:
     @click.command('task-manager-remove', help='Removing a task')
     @click.option('--id', 'id', help='ID of the task, type: Integer', type=int)
     @click.option('--c', 'category', help='Category: String, format: "Some text"', type=str)
-    def remove_task(id: Union[int, None], category: Union[str, None]) -> None:
+    @click.option('--rid', 'template_id', help='ID of the recurring task, type: Integer', type=int)
+    def remove_task(id: Union[int, None], category: Union[str, None], template_id: Union[int, None]) -> None:
         """
-        Removing tasks by ID or category
+        Removing tasks by ID or category, or a recurring task by its ID
         parameters:
             id: int - ID of the task
             category: str - Category of the task
+            template_id: int - ID of the recurring task
         return: None
         """
+        store = get_store()
         try:
-            data = TaskModelForRemove(id=id, category=category)
+            data = TaskModelForRemove(id=id, category=category, template_id=template_id)
         except(TypeError, ValueError) as exc:
             click.echo(f"{exc.__class__.__name__}: {exc}")
             return
         data = data.model_dump()
-        if os.path.exists('misc/task_data.csv'):
-            with open('misc/task_data.csv', 'r') as file_for_read:
+        if data['template_id'] is not None:
+            templates = read_templates(store)
+            if data['template_id'] in [int(i['id']) for i in templates]:
+                write_templates(store, [i for i in templates if int(i['id']) != data['template_id']])
+            else:
+                click.echo('Invalid recurring task ID')
+            return
+        templates_search = []
+        if not data['id'] and data['category']:
+            # Recurring tasks are kept apart from the task file and may exist without it
+            pattern = re.compile(r'\b{}\b'.format(re.escape(category)), re.IGNORECASE)
+            templates = read_templates(store)
+            templates_search = [i for i in templates if bool(pattern.search(i['category']))]
+            if len(templates_search) != 0:
+                write_templates(store, [i for i in templates if i not in templates_search])
+        if os.path.exists(store):
+            with open(store, 'r') as file_for_read:
                 reader = csv.DictReader(file_for_read)
                 list_data = list(reader)
                 if data['id']:
                     if id in [int(i['id']) for i in list_data]:
+                        stats = load_stats(store)
+                        removed = [i for i in list_data if int(i['id']) == id]
                         list_data = [i for i in list_data if int(i['id']) != id]
-                        with open('misc/task_data2.csv', 'w') as file_for_write:
+                        with open(store + '.tmp', 'w') as file_for_write:
                             writer = csv.DictWriter(f=file_for_write, fieldnames=['id', 'title', 'description', 'category', 
                                                                     'due_date', 'priority', 'status'])
                             writer.writeheader()
                             writer.writerows(list_data)
-                            os.remove('misc/task_data.csv')
-                            os.rename('misc/task_data2.csv', 'misc/task_data.csv')
+                            os.remove(store)
+                            os.rename(store + '.tmp', store)
+                        record_changes(store, stats, removed=removed)
                     else:
                         click.echo('Invalid task ID')
                 elif data['category']:
-                    pattern = re.compile(r'\b{}\b'.format(re.escape(category)), re.IGNORECASE)
                     list_search = [i for i in list_data if bool(pattern.search(i['category']))]
                     if len(list_search) != 0:
+                        stats = load_stats(store)
                         list_data = [i for i in list_data if i not in list_search]
-                        with open('misc/task_data2.csv', 'w') as file_for_write:
+                        with open(store + '.tmp', 'w') as file_for_write:
                             writer = csv.DictWriter(f=file_for_write, fieldnames=['id', 'title', 'description', 'category', 
                                                                     'due_date', 'priority', 'status'])
                             writer.writeheader()
                             writer.writerows(list_data)
-                            os.remove('misc/task_data.csv')
-                            os.rename('misc/task_data2.csv', 'misc/task_data.csv')
-                    else:
+                            os.remove(store)
+                            os.rename(store + '.tmp', store)
+                        record_changes(store, stats, removed=list_search)
+                    elif len(templates_search) == 0:
                         click.echo('No tasks found in this category.')
                 else:
                     click.echo('The ID or category was not specified')
-        else:
+        elif len(templates_search) == 0:
             click.echo('No tasks found.')
     
     @click.command('task-manager-search', help='Task search')
     @click.option('--kw', 'keyword', help='Search by keywords', type=str)
     @click.option('--c', 'category', help='Search by category', type=str)
     @click.option('--s', 'status', help='Search by status', type=str)
-    def task_search(keyword: Union[str, None], category: Union[str, None], status: Union[str, None]) -> None:
+    @click.option('--from', 'date_from', help='First day for recurring tasks: Date, format: "%Y-%m-%d", '
+                                              'default: today', type=click.DateTime(formats=['%Y-%m-%d']))
+    @click.option('--to', 'date_to', help='Last day for recurring tasks: Date, format: "%Y-%m-%d", '
+                                          'default: a week from the first day', type=click.DateTime(formats=['%Y-%m-%d']))
+    def task_search(keyword: Union[str, None], category: Union[str, None], status: Union[str, None],
+                    date_from: Optional[datetime], date_to: Optional[datetime]) -> None:
         """
         Search for tasks by keywords in the title 
-        or description, search by category or status
+        or description, search by category or status.
+        Recurring tasks are searched for each of their
+        dates in the specified period
         parameters:
             keyword: str - Keywords to search in the title or description
             category: str - Category of the task
             status: str - Status of the task
+            date_from: Optional[datetime] - First day for recurring tasks
+            date_to: Optional[datetime] - Last day for recurring tasks
         return: None
         """
         try:
@@ -232,52 +355,60 @@ class TaskManager:
             click.echo(f"{exc.__class__.__name__}: {exc}")
             return
         data = data.model_dump()
-        if os.path.exists('misc/task_data.csv'):
-            with open('misc/task_data.csv', 'r') as file_for_read:
-                reader = csv.DictReader(file_for_read)
-                task_exists = False
-                tasks_data = list(reader)
-                if len(tasks_data) == 0:
-                    click.echo('No tasks found.')
-                    return
-                tasks_data.insert(0, reader.fieldnames)
-                for row in tasks_data:
-                    if data['keyword']:
-                        pattern = re.compile(r'\b{}\b'.format(re.escape(data['keyword'])), re.IGNORECASE)
-                        if isinstance(row, list): 
-                            click.echo(' | '.join(row))
-                        elif bool(pattern.search(row['title'])) or bool(pattern.search(row['description'])):
-                            task_exists = True
-                            click.echo(f'{row["id"]} | {row["title"]} | '
-                                    f'{row['description']} | {row['category']} | '
-                                    f'{row['due_date']} | {row['priority']} | '
-                                    f'{row['status']}')
-                    elif data['category']:
-                        pattern = re.compile(r'\b{}\b'.format(re.escape(data['category'])), re.IGNORECASE)
-                        if isinstance(row, list):
-                            click.echo(' | '.join(row))
-                        elif bool(pattern.search(row['category'])):
-                            task_exists = True
-                            click.echo(f'{row["id"]} | {row["title"]} | '
-                                    f'{row['description']} | {row['category']} | '
-                                    f'{row['due_date']} | {row['priority']} | '
-                                    f'{row['status']}')
-                    elif data['status']:
-                        if isinstance(row, list):
-                            click.echo(' | '.join(row))
-                        elif data['status'].lower() == row['status'].lower():
-                            task_exists = True
-                            click.echo(f'{row["id"]} | {row["title"]} | '
-                                    f'{row['description']} | {row['category']} | '
-                                    f'{row['due_date']} | {row['priority']} | '
-                                    f'{row['status']}')
-                    else:
-                        click.echo('The status, category or keyword was not specified')
-                        return
-                if not task_exists:
-                    click.echo('No tasks were found for the specified parameters')
+        if not (data['keyword'] or data['category'] or data['status']):
+            click.echo('The status, category or keyword was not specified')
+            return
+        date_from, date_to = get_period(date_from, date_to)
+        stores = expand_stores(get_stores())
+        if data['keyword'] or data['category']:
+            query = data['keyword'] or data['category']
+            fields = ['title', 'description'] if data['keyword'] else ['category']
+            pattern = re.compile(r'\b{}\b'.format(re.escape(query)), re.IGNORECASE)
+            # Only rows containing the query in their raw bytes are parsed
+            prefilter = compile_prefilter(query)
         else:
+            prefilter = None
+
+        def matches(row: dict) -> bool:
+            if data['keyword'] or data['category']:
+                return any(bool(pattern.search(row[field])) for field in fields)
+            return data['status'].lower() == row['status'].lower()
+
+        tasks_exist, task_exists = echo_tasks(stores, query_stores(stores, matches, prefilter, date_from, date_to))
+        if not tasks_exist:
             click.echo('No tasks found.')
+        elif not task_exists:
+            click.echo('No tasks were found for the specified parameters')
+
+    @click.command('task-manager-stats', help='Show task statistics')
+    @click.option('--rebuild', 'rebuild', help='Recompute statistics from all tasks', is_flag=True)
+    def get_stats(rebuild: bool) -> None:
+        """
+        Viewing the number of tasks by category, status and priority,
+        as well as the number of overdue tasks and tasks due this week.
+        The counters are kept up to date by the add, edit and remove
+        commands, so the cost does not depend on the number of tasks.
+        The tasks of the recurring tasks for the current week are added
+        to the counters
+        parameters:
+            rebuild: bool - Recompute statistics from all tasks
+        return: None
+        """
+        store = get_store()
+        stats = None if rebuild else load_stats(store)
+        if stats is None:
+            stats = rebuild_stats(store)
+        add_occurrences(stats, read_templates(store), date.today())
+        if stats['total'] == 0:
+            click.echo('No tasks found.')
+            return
+        overdue, due_this_week = count_due(stats, date.today())
+        click.echo(f'Total | {stats["total"]}')
+        click.echo(f'Overdue | {overdue}')
+        click.echo(f'Due this week | {due_this_week}')
+        for field in COUNTED_FIELDS:
+            for value, count in sorted(stats[field].items()):
+                click.echo(f'{field} | {value} | {count}')
         
 
 if __name__ == '__main__':
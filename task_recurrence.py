@@ -0,0 +1,188 @@
+from datetime import date, datetime, timedelta
+import csv
+import os
+from typing import Callable, Iterable, Iterator, Union
+
+
+TEMPLATE_FIELDNAMES = ['id', 'title', 'description', 'category', 'due_date',
+                       'priority', 'status', 'repeat', 'exceptions']
+REPEAT_VALUES = ['daily', 'weekly', 'monthly']
+# Number of days shown for recurring tasks when the period is not specified
+DEFAULT_PERIOD_DAYS = 7
+# Minute, hour, day of the month, month and day of the week (0 or 7 is Sunday)
+CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> set[int]:
+    """
+    Parses a cron field such as "*", "*/2", "1,15" or "1-5/2"
+    parameters:
+        field: str - Field of the cron expression
+        low: int - Lowest allowed value
+        high: int - Highest allowed value
+    return: set[int]
+    """
+    values = set()
+    for part in field.split(','):
+        value_range, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if value_range == '*':
+            start, end = low, high
+        elif '-' in value_range:
+            start, end = (int(value) for value in value_range.split('-', 1))
+        else:
+            start = int(value_range)
+            end = high if step != 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Invalid value in the cron field '{field}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def validate_repeat(value: str) -> str:
+    """
+    Checks whether the repeat rule is 'daily', 'weekly', 'monthly'
+    or a cron expression of five fields
+    parameters:
+        value: str - Repeat rule
+    return: str
+    """
+    if value.strip().lower() in REPEAT_VALUES:
+        return value.strip().lower()
+    fields = value.split()
+    if len(fields) != len(CRON_RANGES):
+        raise ValueError("Repeat must be 'daily', 'weekly', 'monthly' or a cron expression, "
+                         "format: 'minute hour day month weekday'")
+    try:
+        for field, (low, high) in zip(fields, CRON_RANGES):
+            _parse_cron_field(field, low, high)
+    except ValueError as exc:
+        raise ValueError(f"Invalid cron expression: {exc}") from None
+    return ' '.join(fields)
+
+
+def _get_day_matcher(template: dict) -> Callable[[date], bool]:
+    """
+    Returns a function checking whether a task of the template falls on a day
+    """
+    start = date.fromisoformat(template['due_date'])
+    repeat = template['repeat']
+    if repeat == 'daily':
+        return lambda day: True
+    if repeat == 'weekly':
+        return lambda day: day.weekday() == start.weekday()
+    if repeat == 'monthly':
+        # Months without such a day are skipped, as cron does
+        return lambda day: day.day == start.day
+    _, _, day_field, month_field, weekday_field = repeat.split()
+    days = _parse_cron_field(day_field, 1, 31)
+    months = _parse_cron_field(month_field, 1, 12)
+    weekdays = {weekday % 7 for weekday in _parse_cron_field(weekday_field, 0, 7)}
+    any_day = day_field.startswith('*') or weekday_field.startswith('*')
+
+    def matches(day: date) -> bool:
+        if day.month not in months:
+            return False
+        day_matches = day.day in days
+        weekday_matches = day.isoweekday() % 7 in weekdays
+        # If both the day of the month and the day of the week are
+        # restricted, cron runs the task when either of them matches
+        if any_day:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+    return matches
+
+
+def iter_occurrences(template: dict, start: date, end: date) -> Iterator[date]:
+    """
+    Generates the dates of the template tasks between start and end inclusive,
+    skipping the dates already saved as separate tasks. The cost depends
+    only on the length of the period, not on the number of tasks
+    parameters:
+        template: dict - Recurring task
+        start: date - First day of the period
+        end: date - Last day of the period
+    return: Iterator[date]
+    """
+    matches = _get_day_matcher(template)
+    exceptions = set(template['exceptions'].split(';')) if template['exceptions'] else set()
+    day = max(start, date.fromisoformat(template['due_date']))
+    while day <= end:
+        if matches(day) and day.isoformat() not in exceptions:
+            yield day
+        day += timedelta(days=1)
+
+
+def get_period(start: Union[datetime, None], end: Union[datetime, None]) -> tuple[date, date]:
+    """
+    Returns the period for recurring tasks, by default
+    a week starting today
+    parameters:
+        start: Union[datetime, None] - First day of the period
+        end: Union[datetime, None] - Last day of the period
+    return: tuple[date, date]
+    """
+    start = start.date() if start else date.today()
+    end = end.date() if end else start + timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    return start, end
+
+
+def expand_templates(templates: Iterable[dict], start: date, end: date) -> list[dict]:
+    """
+    Creates the tasks of the recurring tasks for the period, ordered by date.
+    The IDs of such tasks have the prefix "R" followed by the ID of the template
+    parameters:
+        templates: Iterable[dict] - Recurring tasks
+        start: date - First day of the period
+        end: date - Last day of the period
+    return: list[dict]
+    """
+    tasks = []
+    for template in templates:
+        for day in iter_occurrences(template, start, end):
+            task = {field: template[field] for field in TEMPLATE_FIELDNAMES[:7]}
+            task['id'] = f'R{template["id"]}'
+            task['due_date'] = day.isoformat()
+            tasks.append(task)
+    tasks.sort(key=lambda task: task['due_date'])
+    return tasks
+
+
+def get_templates_path(data_path: str) -> str:
+    """
+    Returns the path of the file of recurring tasks kept next to the task file
+    parameters:
+        data_path: str - Path to the task file
+    return: str
+    """
+    return os.path.splitext(data_path)[0] + '_templates.csv'
+
+
+def read_templates(data_path: str) -> list[dict]:
+    """
+    Reads the recurring tasks of the task file
+    parameters:
+        data_path: str - Path to the task file
+    return: list[dict]
+    """
+    templates_path = get_templates_path(data_path)
+    if not os.path.exists(templates_path):
+        return []
+    with open(templates_path, 'r') as file_for_read:
+        return list(csv.DictReader(file_for_read))
+
+
+def write_templates(data_path: str, templates: list[dict]) -> None:
+    """
+    Rewrites the file of recurring tasks
+    parameters:
+        data_path: str - Path to the task file
+        templates: list[dict] - Recurring tasks
+    return: None
+    """
+    templates_path = get_templates_path(data_path)
+    with open(templates_path + '.tmp', 'w') as file_for_write:
+        writer = csv.DictWriter(f=file_for_write, fieldnames=TEMPLATE_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(templates)
+    os.replace(templates_path + '.tmp', templates_path)
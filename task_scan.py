@@ -0,0 +1,162 @@
+import csv
+import io
+import locale
+import mmap
+import os
+import re
+from typing import Iterator, Union
+
+
+# Characters that re.IGNORECASE treats as equal to a character which
+# str.lower() and str.upper() do not reach, such as the Kelvin sign for 'k',
+# the long s for 's' or the capital sharp s for 'ß'
+SPECIAL_CASES = ('Ii\u00b5\u0130\u0131\u017f\u01c5\u01c8\u01cb\u01f2\u0345\u0390'
+                 '\u03b0\u03c2\u03d0\u03d1\u03d5\u03d6\u03f0\u03f1\u03f4\u03f5\u1c80\u1c81'
+                 '\u1c82\u1c83\u1c84\u1c85\u1c86\u1c87\u1c88\u1e9b\u1e9e\u1f88\u1f89\u1f8a'
+                 '\u1f8b\u1f8c\u1f8d\u1f8e\u1f8f\u1f98\u1f99\u1f9a\u1f9b\u1f9c\u1f9d\u1f9e'
+                 '\u1f9f\u1fa8\u1fa9\u1faa\u1fab\u1fac\u1fad\u1fae\u1faf\u1fbc\u1fbe\u1fcc'
+                 '\u1fd3\u1fe3\u1ffc\u2126\u212a\u212b\ufb05\ufb06')
+
+
+def get_encoding() -> str:
+    """
+    Returns the encoding used by open() for the task file
+    """
+    return locale.getpreferredencoding(False)
+
+
+def get_case_variants(char: str) -> list[str]:
+    """
+    Returns all characters matching the character under re.IGNORECASE
+    parameters:
+        char: str - Character
+    return: list[str]
+    """
+    candidates = {char, char.lower(), char.upper()}
+    candidates |= {case for candidate in list(candidates) for case in (candidate.lower(), candidate.upper())}
+    candidates = {candidate for candidate in candidates if len(candidate) == 1} | set(SPECIAL_CASES)
+    pattern = re.compile(re.escape(char), re.IGNORECASE)
+    return sorted(candidate for candidate in candidates if pattern.fullmatch(candidate))
+
+
+def compile_prefilter(text: str) -> re.Pattern[bytes]:
+    """
+    Compiles a case-insensitive pattern that finds the text
+    in the raw bytes of the task file. Every row the text matches
+    with re.IGNORECASE matches, but a match still has to be checked
+    on the parsed row
+    parameters:
+        text: str - Text to search for
+    return: re.Pattern[bytes]
+    """
+    encoding = get_encoding()
+    variants = [get_case_variants(char) for char in text]
+    if all(variant.isascii() for char_variants in variants for variant in char_variants):
+        # Quotes are doubled inside quoted CSV fields
+        return re.compile(re.escape(text.encode(encoding)).replace(b'"', b'""?'), re.IGNORECASE)
+    parts = []
+    for char_variants in variants:
+        if char_variants == ['"']:
+            parts.append(b'""?')
+            continue
+        encoded = []
+        for variant in char_variants:
+            try:
+                encoded.append(re.escape(variant.encode(encoding)))
+            except UnicodeEncodeError:
+                # A character the encoding cannot represent does not occur in the file
+                continue
+        # (?!) never matches, the text cannot occur in the file at all
+        parts.append(b'(?:' + b'|'.join(encoded) + b')' if encoded else b'(?!)')
+    return re.compile(b''.join(parts))
+
+
+def read_header(data_path: str) -> tuple[Union[list[str], None], bool]:
+    """
+    Reads the column names of the task file
+    parameters:
+        data_path: str - Path to the task file
+    return: tuple[Union[list[str], None], bool] - column names
+            and whether the file contains any tasks
+    """
+    with open(data_path, 'r') as file_for_read:
+        reader = csv.reader(file_for_read)
+        fieldnames = next(reader, None)
+        return fieldnames, next(reader, None) is not None
+
+
+def read_tasks(data_path: str) -> Iterator[dict]:
+    """
+    Reads all tasks of the task file one by one
+    parameters:
+        data_path: str - Path to the task file
+    return: Iterator[dict]
+    """
+    if not os.path.exists(data_path):
+        return
+    with open(data_path, 'r') as file_for_read:
+        yield from csv.DictReader(file_for_read)
+
+
+def _find_record_end(data: mmap.mmap, start: int) -> int:
+    """
+    Returns the offset just past the record that begins at start,
+    line breaks inside quoted fields do not end the record
+    """
+    position, quotes = start, 0
+    while True:
+        line_end = data.find(b'\n', position)
+        if line_end == -1:
+            return len(data)
+        quotes += data[position:line_end].count(b'"')
+        if quotes % 2 == 0:
+            return line_end + 1
+        position = line_end + 1
+
+
+def _parse_record(record: bytes, fieldnames: Union[list[str], None]) -> Union[dict, list, None]:
+    """
+    Parses a single record the same way as reading the file with open()
+    """
+    stream = io.StringIO(record.decode(get_encoding()), newline=None)
+    if fieldnames is None:
+        return next(csv.reader(stream), None)
+    return next(csv.DictReader(stream, fieldnames=fieldnames), None)
+
+
+def scan_candidates(data_path: str, pattern: re.Pattern[bytes]) -> Iterator[dict]:
+    """
+    Finds the tasks whose raw bytes match the pattern without parsing
+    the whole file: the file is memory-mapped, the pattern is run over
+    the bytes and only the records containing a match are parsed
+    parameters:
+        data_path: str - Path to the task file
+        pattern: re.Pattern[bytes] - Pattern from compile_prefilter()
+    return: Iterator[dict] - candidate tasks in file order
+    """
+    if os.path.getsize(data_path) == 0:
+        return
+    with open(data_path, 'rb') as file_for_read:
+        with mmap.mmap(file_for_read.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            header_end = _find_record_end(data, 0)
+            fieldnames = _parse_record(data[:header_end], None)
+            has_quotes = data.find(b'"', header_end) != -1
+            # Offset of a record start that every candidate lies after
+            boundary = header_end
+            while True:
+                match = pattern.search(data, boundary)
+                if match is None:
+                    return
+                start = data.rfind(b'\n', boundary, match.start()) + 1 or boundary
+                quotes = data[boundary:start].count(b'"') if has_quotes else 0
+                while quotes % 2:
+                    # The line continues a multi-line quoted field,
+                    # step back one line until the quotes are balanced
+                    previous = data.rfind(b'\n', boundary, start - 1) + 1 or boundary
+                    quotes -= data[previous:start].count(b'"')
+                    start = previous
+                end = _find_record_end(data, start)
+                row = _parse_record(data[start:end], fieldnames)
+                if row:
+                    yield row
+                boundary = end
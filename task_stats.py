@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+import csv
+import json
+import os
+from typing import Iterable, Union
+
+from task_recurrence import expand_templates
+
+
+COUNTED_FIELDS = ['category', 'status', 'priority']
+
+
+def get_stats_path(data_path: str) -> str:
+    """
+    Returns the path of the statistics file kept next to the task file
+    parameters:
+        data_path: str - Path to the task file
+    return: str
+    """
+    return os.path.splitext(data_path)[0] + '_stats.json'
+
+
+def get_signature(data_path: str) -> Union[list, None]:
+    """
+    Returns the size and modification time of the task file,
+    used to find out whether the saved statistics are still valid
+    parameters:
+        data_path: str - Path to the task file
+    return: Union[list, None]
+    """
+    if not os.path.exists(data_path):
+        return None
+    file_stat = os.stat(data_path)
+    return [file_stat.st_size, file_stat.st_mtime_ns]
+
+
+def empty_stats() -> dict:
+    """
+    Returns statistics for an empty task list
+    """
+    return {'signature': None, 'total': 0, 'category': {}, 'status': {},
+            'priority': {}, 'pending_due_date': {}}
+
+
+def load_stats(data_path: str) -> Union[dict, None]:
+    """
+    Loads the saved statistics of the task file
+    parameters:
+        data_path: str - Path to the task file
+    return: Union[dict, None] - None if the statistics are missing
+            or the task file was changed without updating them
+    """
+    stats_path = get_stats_path(data_path)
+    if not os.path.exists(stats_path):
+        return None
+    try:
+        with open(stats_path, 'r') as file_for_read:
+            stats = json.load(file_for_read)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(stats, dict) or stats.get('signature') != get_signature(data_path):
+        return None
+    return stats
+
+
+def save_stats(data_path: str, stats: dict) -> None:
+    """
+    Saves the statistics along with the current signature of the task file
+    parameters:
+        data_path: str - Path to the task file
+        stats: dict - Statistics to save
+    return: None
+    """
+    stats['signature'] = get_signature(data_path)
+    stats_path = get_stats_path(data_path)
+    with open(stats_path + '.tmp', 'w') as file_for_write:
+        json.dump(stats, file_for_write)
+    os.replace(stats_path + '.tmp', stats_path)
+
+
+def apply_changes(stats: dict, added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> dict:
+    """
+    Updates the counters for the added and removed tasks,
+    the cost depends only on the number of changed tasks
+    parameters:
+        stats: dict - Statistics to update
+        added: Iterable[dict] - Tasks added to the list
+        removed: Iterable[dict] - Tasks removed from the list
+    return: dict
+    """
+    for row in added:
+        _count_task(stats, row, 1)
+    for row in removed:
+        _count_task(stats, row, -1)
+    return stats
+
+
+def _count_task(stats: dict, row: dict, step: int) -> None:
+    """
+    Adds a step to every counter the task belongs to
+    """
+    stats['total'] += step
+    keys = [(field, str(row[field])) for field in COUNTED_FIELDS]
+    # Only unfinished tasks can be overdue or due soon
+    if str(row['status']) != 'True':
+        keys.append(('pending_due_date', str(row['due_date'])))
+    for field, value in keys:
+        counter = stats[field]
+        counter[value] = counter.get(value, 0) + step
+        if counter[value] <= 0:
+            del counter[value]
+
+
+def rebuild_stats(data_path: str) -> dict:
+    """
+    Recomputes the statistics from all tasks in the file and saves them
+    parameters:
+        data_path: str - Path to the task file
+    return: dict
+    """
+    stats = empty_stats()
+    if os.path.exists(data_path):
+        with open(data_path, 'r') as file_for_read:
+            apply_changes(stats, added=csv.DictReader(file_for_read))
+    save_stats(data_path, stats)
+    return stats
+
+
+def record_changes(data_path: str, stats: Union[dict, None],
+                   added: Iterable[dict] = (), removed: Iterable[dict] = ()) -> None:
+    """
+    Brings the statistics up to date after the task file was rewritten.
+    The statistics must be loaded before the file is changed, if they
+    were missing or outdated they are recomputed from scratch
+    parameters:
+        data_path: str - Path to the task file
+        stats: Union[dict, None] - Statistics loaded before the change
+        added: Iterable[dict] - Tasks added to the list
+        removed: Iterable[dict] - Tasks removed from the list
+    return: None
+    """
+    if stats is None:
+        rebuild_stats(data_path)
+        return
+    save_stats(data_path, apply_changes(stats, added, removed))
+
+
+def add_occurrences(stats: dict, templates: Iterable[dict], today: date) -> dict:
+    """
+    Adds the tasks of the recurring tasks for the current week (Monday
+    to Sunday) to the counters, the recurring tasks are not saved as rows
+    so they are not in the saved statistics. The cost depends only
+    on the number of recurring tasks, not on the number of tasks
+    parameters:
+        stats: dict - Statistics of the task file
+        templates: Iterable[dict] - Recurring tasks of the task file
+        today: date - Current date
+    return: dict
+    """
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = start_of_week + timedelta(days=6)
+    return apply_changes(stats, added=expand_templates(templates, start_of_week, end_of_week))
+
+
+def count_due(stats: dict, today: date) -> tuple[int, int]:
+    """
+    Counts unfinished tasks that are overdue and that are due
+    by the end of the current week (Monday to Sunday)
+    parameters:
+        stats: dict - Statistics of the task file
+        today: date - Current date
+    return: tuple[int, int] - overdue and due this week
+    """
+    end_of_week = today + timedelta(days=6 - today.weekday())
+    overdue, due_this_week = 0, 0
+    for value, count in stats['pending_due_date'].items():
+        try:
+            due_date = date.fromisoformat(value)
+        except ValueError:
+            continue
+        if due_date < today:
+            overdue += count
+        elif due_date <= end_of_week:
+            due_this_week += count
+    return overdue, due_this_week
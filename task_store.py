@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import os
+import re
+from typing import Callable, Iterator, Union
+
+import click
+
+from task_recurrence import expand_templates, read_templates
+from task_scan import read_header, read_tasks, scan_candidates
+
+
+DEFAULT_STORE = 'misc/task_data.csv'
+STORE_ENVVAR = 'TASK_MANAGER_STORE'
+MAX_WORKERS = 16
+
+
+def get_stores() -> list[str]:
+    """
+    Returns the task files passed to the task manager with the --store
+    option, which click also reads from the TASK_MANAGER_STORE environment
+    variable, by default misc/task_data.csv
+    """
+    context = click.get_current_context(silent=True)
+    options = context.find_root().obj if context else None
+    if options and options.get('stores'):
+        return list(options['stores'])
+    return [DEFAULT_STORE]
+
+
+def get_store() -> str:
+    """
+    Returns the task file for the commands that change tasks,
+    only a single file can be used by them
+    """
+    stores = get_stores()
+    if len(stores) != 1 or os.path.isdir(stores[0]):
+        raise click.UsageError('Only a single store file can be used with this command')
+    if not os.path.isdir(os.path.dirname(stores[0]) or '.'):
+        raise click.UsageError(f'The directory of the store "{stores[0]}" does not exist')
+    return stores[0]
+
+
+def expand_stores(stores: list[str]) -> list[str]:
+    """
+    Replaces directories with the task files they contain. A file
+    of recurring tasks without its task file stands for that task file
+    parameters:
+        stores: list[str] - Task files and directories of task files
+    return: list[str]
+    """
+    data_paths = []
+    for store in stores:
+        if os.path.isdir(store):
+            names = set()
+            for name in os.listdir(store):
+                if name.endswith('_templates.csv'):
+                    names.add(name.removesuffix('_templates.csv') + '.csv')
+                elif name.endswith('.csv'):
+                    names.add(name)
+            data_paths.extend(os.path.join(store, name) for name in sorted(names))
+        else:
+            data_paths.append(store)
+    return data_paths
+
+
+def query_store(data_path: str, matches: Callable[[dict], bool], prefilter: Union[re.Pattern[bytes], None],
+                date_from: date, date_to: date) -> tuple[bool, list[dict]]:
+    """
+    Finds the tasks of a task file, including the tasks
+    of its recurring tasks for the period
+    parameters:
+        data_path: str - Path to the task file
+        matches: Callable[[dict], bool] - Checks whether the task is found
+        prefilter: Union[re.Pattern[bytes], None] - Pattern for scan_candidates(),
+                   if not passed every task is checked
+        date_from: date - First day for recurring tasks
+        date_to: date - Last day for recurring tasks
+    return: tuple[bool, list[dict]] - whether the file contains any tasks
+            and the found tasks: the tasks in file order followed by
+            the tasks of its recurring tasks ordered by date
+    """
+    templates = read_templates(data_path)
+    _, has_tasks = read_header(data_path) if os.path.exists(data_path) else (None, False)
+    tasks_data = []
+    if has_tasks:
+        rows = scan_candidates(data_path, prefilter) if prefilter else read_tasks(data_path)
+        tasks_data = [row for row in rows if matches(row)]
+    tasks_data.extend(expand_templates([i for i in templates if matches(i)], date_from, date_to))
+    return has_tasks or len(templates) != 0, tasks_data
+
+
+def query_stores(stores: list[str], matches: Callable[[dict], bool], prefilter: Union[re.Pattern[bytes], None],
+                 date_from: date, date_to: date) -> Iterator[tuple[str, bool, list[dict]]]:
+    """
+    Finds the tasks of several task files, the files are read
+    concurrently. The results are returned in the order of the files
+    as soon as each file is read, so the first results are available
+    before the slowest file is done. Only the found tasks of each file
+    are kept in memory, in the same order as for a single file
+    parameters:
+        stores: list[str] - Task files
+        matches: Callable[[dict], bool] - Checks whether the task is found
+        prefilter: Union[re.Pattern[bytes], None] - Pattern for scan_candidates()
+        date_from: date - First day for recurring tasks
+        date_to: date - Last day for recurring tasks
+    return: Iterator[tuple[str, bool, list[dict]]] - the file, whether
+            it contains any tasks and its found tasks
+    """
+    if len(stores) == 0:
+        return
+    with ThreadPoolExecutor(max_workers=min(len(stores), MAX_WORKERS)) as executor:
+        results = executor.map(lambda data_path: query_store(data_path, matches, prefilter, date_from, date_to),
+                               stores)
+        for data_path, (has_tasks, tasks_data) in zip(stores, results):
+            yield data_path, has_tasks, tasks_data
@@ -1,5 +1,7 @@
 from typing import Generator
+from datetime import date, timedelta
 from main import TaskManager
+import task_scan
 import pytest
 import os
 import csv
@@ -260,8 +262,278 @@ def test_search_task_no_tasks(runner: CliRunner) -> None:
     assert "No tasks found." in result.stdout
 
 
+def test_search_task_multiline_fields(runner: CliRunner) -> None:
+    with open('misc/task_data.csv', 'a') as file_for_write:
+        writer = csv.DictWriter(file_for_write, fieldnames=["id", "title", "description",
+                                                            "category", "due_date", "priority", "status"])
+        writer.writerow({"id": "4", "title": "Task 4", "description": "First line\nsecond, \"quoted\" line",
+                         "category": "Study", "due_date": "2024-12-08", "priority": "Low", "status": "False"})
+        writer.writerow({"id": "5", "title": "Task 5", "description": "Study\nplan",
+                         "category": "Home", "due_date": "2024-12-09", "priority": "Low", "status": "False"})
+    result_search_by_keyword = runner.invoke(cli=task_manger.task_search, args=['--kw', 'QUOTED'])
+    result_search_by_category = runner.invoke(cli=task_manger.task_search, args=['--c', 'study'])
+    result_list_by_category = runner.invoke(cli=task_manger.get_list_tasks, args=['--category', 'Study'])
+    assert result_search_by_keyword.exit_code == 0
+    assert 'Task 4' in result_search_by_keyword.stdout
+    assert 'Task 5' not in result_search_by_keyword.stdout
+    assert 'Task 4' in result_search_by_category.stdout
+    assert 'Task 5' not in result_search_by_category.stdout
+    assert 'Task 4' in result_list_by_category.stdout
+    assert 'Task 5' not in result_list_by_category.stdout
+    assert 'Task 1' not in result_list_by_category.stdout
+
+
+def test_search_task_special_case_folding(runner: CliRunner) -> None:
+    with open('misc/task_data.csv', 'a') as file_for_write:
+        writer = csv.DictWriter(file_for_write, fieldnames=["id", "title", "description",
+                                                            "category", "due_date", "priority", "status"])
+        writer.writerow({"id": "4", "title": "Task 4", "description": "Convert to \u212aelvin",
+                         "category": "\u0130stanbul", "due_date": "2024-12-08", "priority": "Low", "status": "False"})
+    result_search_by_keyword = runner.invoke(cli=task_manger.task_search, args=['--kw', 'kelvin'])
+    result_search_by_category = runner.invoke(cli=task_manger.task_search, args=['--c', 'istanbul'])
+    assert 'Task 4' in result_search_by_keyword.stdout
+    assert 'Task 4' in result_search_by_category.stdout
+
+
+def test_prefilter_single_byte_encoding(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(task_scan, 'get_encoding', lambda: 'cp1251')
+    for text in ['work', 'study', 'kelvin', 'Работа', 'Дом']:
+        pattern = task_scan.compile_prefilter(text)
+        assert pattern.search(f'1,Task,{text.upper()},{text.lower()}'.encode('cp1251'))
+    assert task_scan.compile_prefilter('Straße').search('Strasse'.encode('cp1251')) is None
+
+
+def test_add_recurring_task(runner: CliRunner) -> None:
+    today = date.today()
+    result_add = runner.invoke(cli=task_manger.add_task, args=['--t', 'Chore', '--c', 'Home', '--dd', today.isoformat(),
+                                                              '--p', 'Low', '--s', 'False', '--repeat', 'daily'])
+    result_list = runner.invoke(cli=task_manger.get_list_tasks, args=[])
+    result_list_period = runner.invoke(cli=task_manger.get_list_tasks, args=[
+        '--from', (today + timedelta(days=10)).isoformat(), '--to', (today + timedelta(days=12)).isoformat()])
+    result_search = runner.invoke(cli=task_manger.task_search, args=['--kw', 'chore'])
+    with open('misc/task_data.csv', 'r') as file_for_read:
+        tasks_data = list(csv.DictReader(file_for_read))
+    assert result_add.exit_code == 0
+    assert result_list.stdout.count('R1 | Chore') == 7
+    assert f'R1 | Chore | Not specified | Home | {today.isoformat()}' in result_list.stdout
+    assert 'Task 1' in result_list.stdout
+    assert result_list_period.stdout.count('R1 | Chore') == 3
+    assert result_search.stdout.count('R1 | Chore') == 7
+    assert 'Task 1' not in result_search.stdout
+    assert len(tasks_data) == 3
+
+
+def test_add_recurring_task_invalid_repeat(runner: CliRunner) -> None:
+    monday = date.today() + timedelta(days=7 - date.today().weekday())
+    result_invalid_repeat = runner.invoke(cli=task_manger.add_task, args=['--t', 'Chore', '--c', 'Home',
+                                          '--dd', monday.isoformat(), '--p', 'Low', '--s', 'False', '--repeat', 'hourly'])
+    result_invalid_cron = runner.invoke(cli=task_manger.add_task, args=['--t', 'Chore', '--c', 'Home',
+                                        '--dd', monday.isoformat(), '--p', 'Low', '--s', 'False', '--repeat', '0 9 * * 8'])
+    result_cron = runner.invoke(cli=task_manger.add_task, args=['--t', 'Standup', '--c', 'Work',
+                                '--dd', monday.isoformat(), '--p', 'Low', '--s', 'False', '--repeat', '0 9 * * 1-5'])
+    result_list = runner.invoke(cli=task_manger.get_list_tasks, args=[
+        '--category', 'work', '--from', monday.isoformat(), '--to', (monday + timedelta(days=13)).isoformat()])
+    assert 'ValidationError' in result_invalid_repeat.stdout
+    assert 'ValidationError' in result_invalid_cron.stdout
+    assert result_cron.exit_code == 0
+    assert result_list.stdout.count('R1 | Standup') == 10
+    assert 'Task 1' in result_list.stdout
+
+
+def test_edit_recurring_task(runner: CliRunner) -> None:
+    today = date.today()
+    runner.invoke(cli=task_manger.add_task, args=['--t', 'Chore', '--c', 'Home', '--dd', today.isoformat(),
+                                                  '--p', 'Low', '--s', 'False', '--repeat', 'weekly'])
+    result_edit_occurrence = runner.invoke(cli=task_manger.change_task, args=['--rid', '1', '--on', today.isoformat(),
+                                                                              '--s', 'True'])
+    result_invalid_date = runner.invoke(cli=task_manger.change_task, args=[
+        '--rid', '1', '--on', (today + timedelta(days=1)).isoformat(), '--s', 'True'])
+    result_invalid_id = runner.invoke(cli=task_manger.change_task, args=['--rid', '2', '--s', 'True'])
+    result_edit_template = runner.invoke(cli=task_manger.change_task, args=['--rid', '1', '--p', 'High'])
+    result_list = runner.invoke(cli=task_manger.get_list_tasks, args=[
+        '--to', (today + timedelta(days=13)).isoformat()])
+    assert result_edit_occurrence.exit_code == 0
+    assert result_edit_template.exit_code == 0
+    assert 'Invalid occurrence date' in result_invalid_date.stdout
+    assert 'Invalid recurring task ID' in result_invalid_id.stdout
+    assert f'4 | Chore | Not specified | Home | {today.isoformat()} | Low | True' in result_list.stdout
+    assert result_list.stdout.count('R1 | Chore') == 1
+    assert (f'R1 | Chore | Not specified | Home | {(today + timedelta(days=7)).isoformat()} | High | False'
+            in result_list.stdout)
+
+
+def test_remove_recurring_task(runner: CliRunner) -> None:
+    today = date.today()
+    runner.invoke(cli=task_manger.add_task, args=['--t', 'Chore', '--c', 'Home', '--dd', today.isoformat(),
+                                                  '--p', 'Low', '--s', 'False', '--repeat', 'daily'])
+    runner.invoke(cli=task_manger.add_task, args=['--t', 'Review', '--c', 'Work', '--dd', today.isoformat(),
+                                                  '--p', 'Low', '--s', 'False', '--repeat', 'monthly'])
+    result_invalid_id = runner.invoke(cli=task_manger.remove_task, args=['--rid', '3'])
+    result_remove_by_id = runner.invoke(cli=task_manger.remove_task, args=['--rid', '1'])
+    result_remove_by_category = runner.invoke(cli=task_manger.remove_task, args=['--c', 'Work'])
+    result_list = runner.invoke(cli=task_manger.get_list_tasks, args=[])
+    assert result_remove_by_id.exit_code == 0
+    assert result_remove_by_category.exit_code == 0
+    assert 'Invalid recurring task ID' in result_invalid_id.stdout
+    assert 'Chore' not in result_list.stdout
+    assert 'Review' not in result_list.stdout
+    assert 'Task 2' in result_list.stdout
+
+
+def write_store(data_path: str, tasks: list[dict]) -> None:
+    with open(data_path, 'w') as file_for_write:
+        writer = csv.DictWriter(file_for_write, fieldnames=["id", "title", "description",
+                                                            "category", "due_date", "priority", "status"])
+        writer.writeheader()
+        writer.writerows(tasks)
+
+
+def test_store_from_environment(runner: CliRunner, tmp_path) -> None:
+    data_path = str(tmp_path / 'team.csv')
+    due_date = (date.today() + timedelta(days=1)).isoformat()
+    result_add = runner.invoke(cli=task_manger.main, env={'TASK_MANAGER_STORE': data_path},
+                               args=['task-manager-add', '--t', 'Team task', '--c', 'Work', '--dd', due_date,
+                                     '--p', 'Low', '--s', 'False'])
+    result_list = runner.invoke(cli=task_manger.main, env={'TASK_MANAGER_STORE': data_path},
+                                args=['task-manager-list'])
+    result_list_stores = runner.invoke(cli=task_manger.main,
+                                       env={'TASK_MANAGER_STORE': os.pathsep.join([data_path, 'misc/task_data.csv'])},
+                                       args=['task-manager-list'])
+    result_list_default = runner.invoke(cli=task_manger.main, env={'TASK_MANAGER_STORE': None},
+                                        args=['task-manager-list'])
+    assert result_add.exit_code == 0
+    assert os.path.exists(data_path)
+    assert f'1 | Team task | Not specified | Work | {due_date} | Low | False' in result_list.stdout
+    assert 'Task 1' not in result_list.stdout
+    assert f'{data_path} | 1 | Team task' in result_list_stores.stdout
+    assert 'misc/task_data.csv | 1 | Task 1' in result_list_stores.stdout
+    assert 'Team task' not in result_list_default.stdout
+    assert 'Task 1' in result_list_default.stdout
+
+
+def test_multiple_stores(runner: CliRunner, tmp_path) -> None:
+    os.mkdir(tmp_path / 'teams')
+    write_store(str(tmp_path / 'teams' / 'a.csv'), [
+        {"id": "1", "title": "Task A1", "description": "Description", "category": "Work", "due_date": "2024-12-08",
+         "priority": "High", "status": "False"},
+        {"id": "2", "title": "Task A2", "description": "Description", "category": "Home", "due_date": "2024-12-04",
+         "priority": "Low", "status": "True"},
+    ])
+    write_store(str(tmp_path / 'teams' / 'b.csv'), [
+        {"id": "1", "title": "Task B1", "description": "Description", "category": "Work", "due_date": "2024-12-06",
+         "priority": "High", "status": "False"},
+    ])
+    stores = ['--store', 'misc/task_data.csv', '--store', str(tmp_path / 'teams')]
+    result_list = runner.invoke(cli=task_manger.main, args=stores + ['task-manager-list', '--category', 'work'])
+    result_search = runner.invoke(cli=task_manger.main, args=stores + ['task-manager-search', '--s', 'True'])
+    result_add = runner.invoke(cli=task_manger.main, args=stores + ['task-manager-add', '--t', 'Task', '--c', 'Work',
+                                                                    '--dd', date.today().isoformat(),
+                                                                    '--p', 'Low', '--s', 'False'])
+    titles = [line.split(' | ')[2] for line in result_list.stdout.splitlines()[1:]]
+    assert result_list.exit_code == 0
+    assert result_list.stdout.startswith('store | id | title')
+    assert titles == ['Task 1', 'Task 3', 'Task A1', 'Task B1']
+    assert f'{tmp_path / "teams" / "b.csv"} | 1 | Task B1' in result_list.stdout
+    assert 'misc/task_data.csv | 1 | Task 1' in result_list.stdout
+    assert 'Task A2' in result_search.stdout
+    assert 'Task 3' in result_search.stdout
+    assert 'Task B1' not in result_search.stdout
+    assert result_add.exit_code == 2
+    assert 'Only a single store file' in result_add.stdout
+    runner.invoke(cli=task_manger.main, args=['--store', str(tmp_path / 'teams' / 'ops.csv'), 'task-manager-add',
+                                              '--t', 'Chore', '--c', 'Work', '--dd', date.today().isoformat(),
+                                              '--p', 'Low', '--s', 'False', '--repeat', 'weekly'])
+    result_directory = runner.invoke(cli=task_manger.main, args=['--store', str(tmp_path / 'teams'),
+                                                                 'task-manager-list', '--category', 'work'])
+    titles = [line.split(' | ')[2] for line in result_directory.stdout.splitlines()[1:]]
+    assert not os.path.exists(tmp_path / 'teams' / 'ops.csv')
+    assert titles == ['Task A1', 'Task B1', 'Chore']
+    assert f'{tmp_path / "teams" / "ops.csv"} | R1 | Chore' in result_directory.stdout
+
+
+def test_remove_recurring_task_without_task_file(runner: CliRunner) -> None:
+    os.remove('misc/task_data.csv')
+    runner.invoke(cli=task_manger.add_task, args=['--t', 'Chore', '--c', 'Home', '--dd', date.today().isoformat(),
+                                                  '--p', 'Low', '--s', 'False', '--repeat', 'daily'])
+    result_remove_by_category = runner.invoke(cli=task_manger.remove_task, args=['--c', 'Home'])
+    result_list = runner.invoke(cli=task_manger.get_list_tasks, args=[])
+    assert not os.path.exists('misc/task_data.csv')
+    assert result_remove_by_category.exit_code == 0
+    assert 'No tasks found' not in result_remove_by_category.stdout
+    assert 'Chore' not in result_list.stdout
+    assert 'No tasks found.' in result_list.stdout
+
+
+def test_store_in_missing_directory(runner: CliRunner, tmp_path) -> None:
+    stores = ['--store', str(tmp_path / 'missing' / 'team.csv')]
+    result_add = runner.invoke(cli=task_manger.main, args=stores + ['task-manager-add', '--t', 'Task', '--c', 'Work',
+                                                                    '--dd', date.today().isoformat(),
+                                                                    '--p', 'Low', '--s', 'False'])
+    result_stats = runner.invoke(cli=task_manger.main, args=stores + ['task-manager-stats'])
+    assert result_add.exit_code == 2
+    assert result_stats.exit_code == 2
+    assert 'does not exist' in result_add.stdout
+    assert 'does not exist' in result_stats.stdout
+
+
+def test_stats(runner: CliRunner) -> None:
+    result = runner.invoke(cli=task_manger.get_stats, args=[])
+    assert result.exit_code == 0
+    assert 'Total | 3' in result.stdout
+    assert 'Overdue | 1' in result.stdout
+    assert 'category | Work | 2' in result.stdout
+    assert 'category | Personal | 1' in result.stdout
+    assert 'status | True | 2' in result.stdout
+    assert 'priority | High | 1' in result.stdout
+
+
+def test_stats_updated_incrementally(runner: CliRunner) -> None:
+    runner.invoke(cli=task_manger.get_stats, args=[])
+    due_date = (date.today() + timedelta(days=30)).isoformat()
+    runner.invoke(cli=task_manger.add_task, args=['--t', 'Task 4', '--c', 'Study', '--dd', due_date,
+                                                  '--p', 'Low', '--s', 'False'])
+    runner.invoke(cli=task_manger.change_task, args=['--id', '2', '--s', 'True'])
+    runner.invoke(cli=task_manger.remove_task, args=['--id', '1'])
+    result = runner.invoke(cli=task_manger.get_stats, args=[])
+    result_rebuild = runner.invoke(cli=task_manger.get_stats, args=['--rebuild'])
+    assert result.exit_code == 0
+    assert 'Total | 3' in result.stdout
+    assert 'Overdue | 0' in result.stdout
+    assert 'category | Study | 1' in result.stdout
+    assert 'priority | High' not in result.stdout
+    assert result.stdout == result_rebuild.stdout
+
+
+def test_stats_recurring_tasks(runner: CliRunner) -> None:
+    today = date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    runner.invoke(cli=task_manger.add_task, args=['--t', 'Chore', '--c', 'Home', '--dd', start_of_week.isoformat(),
+                                                  '--p', 'Low', '--s', 'False', '--repeat', 'daily'])
+    result = runner.invoke(cli=task_manger.get_stats, args=[])
+    assert result.exit_code == 0
+    assert 'Total | 10' in result.stdout
+    assert f'Overdue | {1 + today.weekday()}' in result.stdout
+    assert f'Due this week | {7 - today.weekday()}' in result.stdout
+    assert 'category | Home | 7' in result.stdout
+    assert 'priority | Low | 8' in result.stdout
+
+
+def test_stats_no_tasks(runner: CliRunner) -> None:
+    with open('misc/task_data.csv', 'w', newline='') as file:
+        file.truncate(0)
+
+    result = runner.invoke(cli=task_manger.get_stats, args=[])
+
+    assert result.exit_code == 0
+    assert "No tasks found." in result.stdout
+
+
 @pytest.fixture(autouse=True)
 def cleanup() -> Generator[None]:
     yield
     if os.path.exists('misc/task_data.csv'):
         os.remove('misc/task_data.csv')
+    if os.path.exists('misc/task_data_stats.json'):
+        os.remove('misc/task_data_stats.json')
+    if os.path.exists('misc/task_data_templates.csv'):
+        os.remove('misc/task_data_templates.csv')
@@ -1,15 +1,18 @@
 from datetime import date
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, Field, ValidationInfo, field_validator, model_validator
 import os
 import csv
 from typing import Union
 
+from task_recurrence import read_templates, validate_repeat
+from task_store import DEFAULT_STORE
+
 
 class TaskModel(BaseModel):
     """
     A model for validating input data for the add_task() function
     """
-    id: int = Field(name='id', default_factory=lambda: TaskModel.generate_id())
+    id: int = Field(name='id', default=0)
     title: str = Field(name='title')
     description: str = Field(name='description')
     category: str = Field(name='category')
@@ -35,20 +38,30 @@ class TaskModel(BaseModel):
         if not values['status']:
             raise TypeError("The status is mandatory")
         return values
+
+    @model_validator(mode='after')
+    def assign_id(self, info: ValidationInfo) -> 'TaskModel':
+        """
+        Generates the ID of a new task in the task file
+        passed as "store" in the validation context
+        """
+        if not self.id:
+            self.id = self.generate_id((info.context or {}).get('store', DEFAULT_STORE))
+        return self
     
     @classmethod
-    def generate_id(cls) -> int:
+    def generate_id(cls, store: str = DEFAULT_STORE) -> int:
         """
         Generates a unique ID for the task
         """
-        file_exists = os.path.exists('misc/task_data.csv')
+        file_exists = os.path.exists(store)
         if not file_exists:
-            with open('misc/task_data.csv', 'a') as file_for_write:
+            with open(store, 'a') as file_for_write:
                 writer = csv.DictWriter(f=file_for_write, fieldnames=['id', 'title', 'description', 'category', 
                                                                     'due_date', 'priority', 'status'])
                 if not file_exists:
                     writer.writeheader()
-        with open('misc/task_data.csv', 'r') as file_for_read:
+        with open(store, 'r') as file_for_read:
             reader = csv.DictReader(file_for_read)
             return len(list(reader)) + 1
 
@@ -97,14 +110,40 @@ class TaskModel(BaseModel):
         return value
 
 
+class TaskTemplateModel(TaskModel):
+    """
+    A model for validating input data of a recurring task
+    for the add_task() function
+    """
+    repeat: str = Field(name='repeat')
+    exceptions: str = Field(name='exceptions', default='')
+
+    @classmethod
+    def generate_id(cls, store: str = DEFAULT_STORE) -> int:
+        """
+        Generates a unique ID for the recurring task
+        """
+        return max([int(template['id']) for template in read_templates(store)], default=0) + 1
+
+    @field_validator('repeat', mode='before')
+    @classmethod
+    def check_repeat(cls, value: str) -> str:
+        """
+        Checks whether the repeat rule corresponds to the correct values
+        """
+        return validate_repeat(value)
+
+
 class TaskModelForChange(BaseModel):
-    id: int = Field(name='id')
+    id: Union[int, None] = Field(name='id')
     title: Union[str, None] = Field(name='title')
     description: Union[str, None] = Field(name='description')
     category: Union[str, None] = Field(name='category')
     due_date: Union[date, None] = Field(name='due_date')
     priority: Union[str, None] = Field(name='priority')
     status: Union[str, None] = Field(name='status')
+    template_id: Union[int, None] = Field(name='template_id', default=None)
+    occurrence_date: Union[date, None] = Field(name='occurrence_date', default=None)
 
     @model_validator(mode='before')
     @classmethod
@@ -113,6 +152,12 @@ class TaskModelForChange(BaseModel):
         Checks whether whitespace characters 
         have been passed instead of parameters
         """
+        if values['id'] is None and values.get('template_id') is None:
+            raise TypeError("The ID of the task or of the recurring task is mandatory")
+        if values['id'] is not None and values.get('template_id') is not None:
+            raise TypeError("Only one of the task ID and the recurring task ID can be passed")
+        if values.get('occurrence_date') and values.get('template_id') is None:
+            raise TypeError("The occurrence date can only be passed for a recurring task")
         if values['title']:
             if values['title'].strip() == '':
                 raise TypeError("The title cannot be a space character")
@@ -167,6 +212,7 @@ class TaskModelForRemove(BaseModel):
     """
     id: Union[int, None] = Field(name='id')
     category: Union[str, None] = Field(name='category')
+    template_id: Union[int, None] = Field(name='template_id', default=None)
 
 class TaskModelForSearch(BaseModel):
     """